@@ -0,0 +1,255 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import repeat
+
+from google_play_scraper import Sort
+import numpy as np
+import pandas as pd
+
+from compact_results import CompactResults
+from instrumentation import NULL_PROFILE
+from inverted_index import get_matcher
+from keyword_index import KeywordIndex, compile_keyword_index
+from review_store import iter_synced_reviews, sync_reviews
+from scraper import iter_batches, iter_reviews, scrape_reviews
+from sentiment import classify_sentiments, score_texts
+from similarity import merge_matches
+
+# Shards per worker in parallel mode, so uneven shards balance out
+SHARDS_PER_WORKER = 4
+
+_worker_index = None
+
+
+# ASCII characters that are neither alphanumeric nor whitespace
+_ASCII_DELETE = bytes(code for code in range(128) if not (chr(code).isalnum() or chr(code).isspace()))
+
+
+# str.translate table for everything else, filled in lazily per code point
+class _CleanTable(dict):
+    def __missing__(self, code):
+        char = chr(code)
+        value = code if char.isalnum() or char.isspace() else None
+        self[code] = value
+        return value
+
+
+_clean_table = _CleanTable()
+
+
+# text cleaning: lowercase and drop everything that isn't alphanumeric or
+# whitespace. Missing content (None/NaN) cleans to an empty string.
+def clean_text(text):
+    if not isinstance(text, str):
+        return ''
+    text = text.lower()
+    if text.isascii():
+        return text.encode('ascii').translate(None, _ASCII_DELETE).decode('ascii')
+    return text.translate(_clean_table)
+
+
+def clean_texts(contents):
+    return [clean_text(content) for content in contents]
+
+
+# Clean one batch of review contents and match it against the keyword index
+def _match_reviews(index, contents, threshold, top_k, profile=NULL_PROFILE, matching='sparse'):
+    with profile.stage('clean', len(contents)):
+        review_texts = clean_texts(contents)
+    with profile.stage('vectorize', len(contents)):
+        review_vectors, review_norms = index.transform(review_texts)
+    with profile.stage('match') as stage:
+        matches = get_matcher(index, matching)(review_vectors, review_norms, threshold=threshold, top_k=top_k)
+        stage['items'] = len(matches.keyword_idx)
+    return review_texts, matches
+
+
+# The keyword index is sent to each worker process once, not with every shard
+def _init_worker(index):
+    global _worker_index
+    _worker_index = index
+
+
+def _match_shard(contents, threshold, top_k, matching):
+    return _match_reviews(_worker_index, contents, threshold, top_k, matching=matching)
+
+
+# Categorize matched reviews by keyword and average their sentiment ratings
+def _summarize(df, matches, keywords_list, review_texts):
+    pairs = pd.DataFrame({"keyword_idx": matches.keyword_idx, "review_idx": matches.review_idx,
+                          "similarity": matches.similarity})
+    pairs['sentiment_rating'] = df['sentiment_rating'].to_numpy(dtype=np.int64, na_value=0)[matches.review_idx]
+    average_sentiment = pairs.groupby('keyword_idx')['sentiment_rating'].mean()
+    
+    # Prepare results for display
+    results = []
+    for keyword_idx, group in pairs.groupby('keyword_idx', sort=True):
+        keyword_result = {"keyword": keywords_list[keyword_idx], "reviews": [
+            {"review": review_texts[j], "score": score, "sentiment_rating": rating}
+            for j, score, rating in zip(group['review_idx'].tolist(), group['similarity'].tolist(),
+                                        group['sentiment_rating'].tolist())
+        ]}
+        keyword_result["average_sentiment"] = float(average_sentiment[keyword_idx])
+        results.append(keyword_result)
+    
+    # Summarize overall sentiment
+    overall_avg_sentiment = None
+    if len(pairs):
+        overall_avg_sentiment = float(pairs['sentiment_rating'].mean())
+    
+    return results, overall_avg_sentiment
+
+
+# Function to scrape, process, and analyze reviews
+# If a ReviewStore is given, reviews are read from it after an incremental sync
+# instead of being scraped from scratch. Only keyword/review pairs with cosine
+# similarity above threshold are kept, and at most top_k reviews per keyword.
+# Sentiment scores are looked up in / added to sentiment_cache if given.
+# With workers > 1, cleaning, matching and sentiment scoring are sharded across
+# a process pool; the results are identical to the serial run.
+# Pass a StageProfile as profile to record the time, item count and peak
+# memory of each stage. With compact=True the results are a CompactResults
+# (array-backed, reviews stored once) instead of a list of dicts.
+# matching selects how reviews are matched to keywords: 'sparse' (one sparse
+# product against all keywords) or 'inverted' (through the term -> keyword
+# inverted index; identical results).
+def analyze_reviews(app_id, keywords_dict, lang='id', country='id', sort=Sort.NEWEST, filter_score_with="",
+                    store=None, max_reviews=900, threshold=0.05, top_k=None,
+                    sentiment_cache=None, workers=None, rate_limiter=None, profile=None, compact=False,
+                    matching='sparse'):
+    profile = profile or NULL_PROFILE
+    with profile.stage('scrape') as stage:
+        if store is None:
+            reviews_data = scrape_reviews(app_id, lang=lang, country=country, sort=sort,
+                                          filter_score_with=filter_score_with, max_reviews=max_reviews,
+                                          rate_limiter=rate_limiter)
+        else:
+            reviews_data = sync_reviews(store, app_id, lang=lang, country=country, sort=sort,
+                                        filter_score_with=filter_score_with, max_reviews=max_reviews,
+                                        rate_limiter=rate_limiter)
+        stage['items'] = len(reviews_data)
+    
+    df = pd.DataFrame(reviews_data)
+    
+    # Use the precompiled keyword index; reviews are only transformed against it
+    index = keywords_dict if isinstance(keywords_dict, KeywordIndex) else compile_keyword_index(keywords_dict)
+    keywords_list = index.labels
+    
+    parallel = workers is not None and workers > 1
+    if parallel:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(index,))
+    else:
+        pool = nullcontext()
+    with pool as executor:
+        # Clean the reviews and find keyword/review pairs above the cosine similarity threshold
+        contents = df['content'].tolist() if 'content' in df else []
+        if parallel:
+            # Cleaning, vectorizing and matching happen together in the workers
+            with profile.stage('parallel_match', len(contents)):
+                shard_size = -(-len(contents) // (workers * SHARDS_PER_WORKER)) or 1
+                offsets = list(range(0, len(contents), shard_size))
+                shards = executor.map(_match_shard, [contents[start:start + shard_size] for start in offsets],
+                                      repeat(threshold), repeat(top_k), repeat(matching))
+                review_texts, parts = [], []
+                for shard_texts, shard_matches in shards:
+                    review_texts.extend(shard_texts)
+                    parts.append(shard_matches)
+                matches = merge_matches(parts, offsets, top_k=top_k)
+        else:
+            review_texts, matches = _match_reviews(index, contents, threshold, top_k, profile, matching)
+        df['cleaned_review'] = review_texts
+        
+        # Score the sentiment of every matched review once (cached by text hash)
+        matched = pd.unique(matches.review_idx)
+        with profile.stage('sentiment', len(matched)):
+            df['compound'] = np.nan
+            df.loc[matched, 'compound'] = score_texts([review_texts[j] for j in matched],
+                                                       cache=sentiment_cache, executor=executor)
+            df['sentiment_rating'] = pd.array([pd.NA] * len(df), dtype='Int8')
+            df.loc[matched, 'sentiment_rating'] = classify_sentiments(df.loc[matched, 'compound'])
+    
+    with profile.stage('aggregate', len(matches.keyword_idx)):
+        if compact:
+            review_ids = df['reviewId'].tolist() if 'reviewId' in df else [None] * len(df)
+            ratings = df['sentiment_rating'].to_numpy(dtype=np.int64, na_value=0)
+            results = CompactResults.from_matches(keywords_list, matches.keyword_idx, matches.review_idx,
+                                                  matches.similarity, review_ids, review_texts, ratings)
+            overall_avg_sentiment = results.overall_avg_sentiment
+        else:
+            results, overall_avg_sentiment = _summarize(df, matches, keywords_list, review_texts)
+    return results, overall_avg_sentiment
+
+
+# Analyze any iterable of review dicts chunk_size reviews at a time, keeping
+# only running per-keyword rating sums and counts instead of the reviews
+# themselves, so memory stays flat however many reviews are streamed. Returns
+# the same averages as analyze_reviews, with "count" in place of "reviews".
+# keep_refs also collects the reviewIds of each keyword's matched reviews as
+# "review_ids"; that list grows with the number of matches.
+def analyze_review_stream(reviews, keywords_dict, chunk_size=1000, threshold=0.05, sentiment_cache=None,
+                          keep_refs=False, profile=None, matching='sparse'):
+    profile = profile or NULL_PROFILE
+    index = keywords_dict if isinstance(keywords_dict, KeywordIndex) else compile_keyword_index(keywords_dict)
+    rating_sums = np.zeros(len(index), dtype=np.int64)
+    counts = np.zeros(len(index), dtype=np.int64)
+    review_ids = [[] for _ in range(len(index))] if keep_refs else None
+    
+    chunks = iter_batches(reviews, chunk_size)
+    while True:
+        # Reviews are scraped lazily, so fetching the next chunk is the scrape stage
+        with profile.stage('scrape') as stage:
+            chunk = next(chunks, None)
+            stage['items'] = len(chunk) if chunk else 0
+        if chunk is None:
+            break
+        
+        review_texts, matches = _match_reviews(index, [review['content'] for review in chunk], threshold, None,
+                                               profile, matching)
+        if not len(matches.keyword_idx):
+            continue
+        
+        # Score each matched review in the chunk once and add its rating to every keyword it matched
+        matched, inverse = np.unique(matches.review_idx, return_inverse=True)
+        with profile.stage('sentiment', len(matched)):
+            compounds = score_texts([review_texts[j] for j in matched], cache=sentiment_cache)
+            ratings = classify_sentiments(compounds).astype(np.int64)[inverse]
+        with profile.stage('aggregate', len(matches.keyword_idx)):
+            rating_sums += np.bincount(matches.keyword_idx, weights=ratings, minlength=len(index)).astype(np.int64)
+            counts += np.bincount(matches.keyword_idx, minlength=len(index))
+            if keep_refs:
+                for i, j in zip(matches.keyword_idx.tolist(), matches.review_idx.tolist()):
+                    review_ids[i].append(chunk[j]['reviewId'])
+    
+    results = []
+    for i in np.flatnonzero(counts).tolist():
+        keyword_result = {"keyword": index.labels[i], "count": int(counts[i]),
+                          "average_sentiment": float(rating_sums[i] / counts[i])}
+        if keep_refs:
+            keyword_result["review_ids"] = review_ids[i]
+        results.append(keyword_result)
+    
+    overall_avg_sentiment = None
+    if counts.sum():
+        overall_avg_sentiment = float(rating_sums.sum() / counts.sum())
+    
+    return results, overall_avg_sentiment
+
+
+# Streaming counterpart of analyze_reviews: reviews are scraped (or synced
+# through the store and read back) lazily and analyzed chunk by chunk.
+# max_reviews=None streams every available review.
+def analyze_reviews_streaming(app_id, keywords_dict, lang='id', country='id', sort=Sort.NEWEST,
+                              filter_score_with="", store=None, max_reviews=None, chunk_size=1000,
+                              threshold=0.05, sentiment_cache=None, keep_refs=False, profile=None,
+                              rate_limiter=None, matching='sparse'):
+    if store is None:
+        reviews = iter_reviews(app_id, lang=lang, country=country, sort=sort,
+                               filter_score_with=filter_score_with, max_reviews=max_reviews,
+                               rate_limiter=rate_limiter)
+    else:
+        reviews = iter_synced_reviews(store, app_id, lang=lang, country=country, sort=sort,
+                                      filter_score_with=filter_score_with, max_reviews=max_reviews,
+                                      batch_size=chunk_size, rate_limiter=rate_limiter)
+    return analyze_review_stream(reviews, keywords_dict, chunk_size=chunk_size, threshold=threshold,
+                                 sentiment_cache=sentiment_cache, keep_refs=keep_refs, profile=profile,
+                                 matching=matching)
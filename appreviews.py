@@ -0,0 +1,203 @@
+# Headless batch runner for analyzing many apps without the Streamlit UI.
+#
+#     python -m appreviews analyze --apps apps.txt --out results.parquet
+#
+# Each app's results are checkpointed as soon as it finishes, so rerunning an
+# interrupted or partly failed command only analyzes the apps that are still
+# missing. The checkpoints are removed once every app has succeeded, so the
+# next run starts from scratch; --fresh discards leftover ones.
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+from google_play_scraper import Sort
+
+from analysis import analyze_reviews
+from instrumentation import StageProfile
+from inverted_index import MATCHING_MODES
+from keyword_index import DEFAULT_INDEX_PATH, compile_keyword_index
+from keywords import keywords_dict
+from review_store import ReviewStore
+from scraper import RateLimiter
+from sentiment import SentimentCache
+
+logger = logging.getLogger("appreviews")
+
+RESULT_COLUMNS = ["app_id", "keyword", "review_count", "average_sentiment", "overall_avg_sentiment", "analyzed_at"]
+
+
+def read_app_ids(path):
+    with open(path, encoding="utf-8") as f:
+        lines = (line.split("#", 1)[0].strip() for line in f)
+        return list(dict.fromkeys(line for line in lines if line))
+
+
+def checkpoint_path(checkpoint_dir, app_id):
+    return os.path.join(checkpoint_dir, re.sub(r"[^\w.-]", "_", app_id) + ".json")
+
+
+# One row per matched keyword, plus a row with keyword=None for apps where
+# nothing matched, so every analyzed app appears in the output
+def result_rows(app_id, results, overall_avg_sentiment, analyzed_at):
+    rows = [dict(app_id=app_id, **summary, overall_avg_sentiment=overall_avg_sentiment, analyzed_at=analyzed_at)
+            for summary in results.keyword_summaries()]
+    if not rows:
+        rows.append({"app_id": app_id, "keyword": None, "review_count": 0, "average_sentiment": None,
+                     "overall_avg_sentiment": overall_avg_sentiment, "analyzed_at": analyzed_at})
+    return rows
+
+
+def write_checkpoint(path, rows):
+    # Write to a temporary file first so an interrupted run never leaves a partial checkpoint
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(rows, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def read_checkpoint(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# Remove the checkpoints of app_ids, and the directory if nothing else is left in it
+def remove_checkpoints(checkpoint_dir, app_ids):
+    for app_id in app_ids:
+        path = checkpoint_path(checkpoint_dir, app_id)
+        if os.path.exists(path):
+            os.remove(path)
+    try:
+        os.rmdir(checkpoint_dir)
+    except OSError:
+        pass
+
+
+def write_results(rows, out):
+    df = pd.DataFrame(rows, columns=RESULT_COLUMNS)
+    if out.endswith(".parquet"):
+        df.to_parquet(out, index=False)
+    elif out.endswith(".csv"):
+        df.to_csv(out, index=False)
+    elif out.endswith(".jsonl"):
+        df.to_json(out, orient="records", lines=True, force_ascii=False)
+    else:
+        raise ValueError(f"Unsupported output format for {out!r}; use .parquet, .csv or .jsonl")
+
+
+def analyze_app(app_id, args, index, store, sentiment_cache, rate_limiter):
+    profile = StageProfile(app_id, trace_memory=args.trace_memory) if args.profile_out else None
+    results, overall_avg_sentiment = analyze_reviews(
+        app_id, index, lang=args.lang, country=args.country,
+        sort=Sort[args.sort.upper()], filter_score_with=args.score, store=store,
+        max_reviews=args.max_reviews, threshold=args.threshold, top_k=args.top_k,
+        sentiment_cache=sentiment_cache, workers=args.workers, rate_limiter=rate_limiter, profile=profile,
+        compact=True, matching=args.matching)
+    return result_rows(app_id, results, overall_avg_sentiment, time.time()), profile
+
+
+def run_analyze(args):
+    app_ids = list(args.app)
+    if args.apps:
+        app_ids.extend(read_app_ids(args.apps))
+    app_ids = list(dict.fromkeys(app_ids))
+    if not app_ids:
+        logger.error("No app IDs given; use --apps FILE or --app ID")
+        return 2
+
+    checkpoint_dir = args.checkpoint_dir or args.out + ".checkpoints"
+    if args.fresh:
+        remove_checkpoints(checkpoint_dir, app_ids)
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    pending = [app_id for app_id in app_ids if not os.path.exists(checkpoint_path(checkpoint_dir, app_id))]
+    logger.info("%d apps, %d already checkpointed, %d to analyze",
+                len(app_ids), len(app_ids) - len(pending), len(pending))
+
+    store = ReviewStore(args.store) if args.store else None
+    sentiment_cache = SentimentCache(args.sentiment_cache) if args.sentiment_cache else None
+    rate_limiter = RateLimiter()
+    # Compile (or load) the keyword index once, before the threads need it
+    index = compile_keyword_index(keywords_dict, path=DEFAULT_INDEX_PATH)
+    failed = []
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            futures = {executor.submit(analyze_app, app_id, args, index, store, sentiment_cache, rate_limiter): app_id
+                       for app_id in pending}
+            for future in as_completed(futures):
+                app_id = futures[future]
+                try:
+                    rows, profile = future.result()
+                except Exception:
+                    logger.exception("Analysis failed for %s", app_id)
+                    failed.append(app_id)
+                    continue
+                write_checkpoint(checkpoint_path(checkpoint_dir, app_id), rows)
+                if profile is not None:
+                    profile.write_jsonl(args.profile_out)
+                logger.info("Analyzed %s", app_id)
+    finally:
+        if store is not None:
+            store.close()
+        if sentiment_cache is not None:
+            sentiment_cache.close()
+
+    rows = []
+    for app_id in app_ids:
+        path = checkpoint_path(checkpoint_dir, app_id)
+        if os.path.exists(path):
+            rows.extend(read_checkpoint(path))
+    write_results(rows, args.out)
+    logger.info("Wrote %d rows for %d apps to %s", len(rows), len(app_ids) - len(failed), args.out)
+
+    if failed:
+        logger.error("%d apps failed, rerun to retry: %s", len(failed), ", ".join(failed))
+        return 1
+    remove_checkpoints(checkpoint_dir, app_ids)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="appreviews", description="Google Play app review analysis")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    analyze = subparsers.add_parser("analyze", help="analyze the reviews of many apps")
+    analyze.add_argument("--apps", help="file with one app ID per line ('#' starts a comment)")
+    analyze.add_argument("--app", action="append", default=[], help="app ID to analyze (repeatable)")
+    analyze.add_argument("--out", required=True, help="output file (.parquet, .csv or .jsonl)")
+    analyze.add_argument("--checkpoint-dir", help="per-app checkpoints (default: <out>.checkpoints)")
+    analyze.add_argument("--fresh", action="store_true",
+                         help="discard checkpoints left by an earlier failed run and analyze every app")
+    analyze.add_argument("--concurrency", type=int, default=4, help="apps analyzed at the same time")
+    analyze.add_argument("--workers", type=int, default=None, help="processes per app analysis")
+    analyze.add_argument("--store", default="reviews.db", help="review store path ('' to always scrape)")
+    analyze.add_argument("--sentiment-cache", default="sentiment_cache.db",
+                         help="sentiment cache path ('' to disable)")
+    analyze.add_argument("--lang", default="id")
+    analyze.add_argument("--country", default="id")
+    analyze.add_argument("--sort", choices=[sort.name.lower() for sort in Sort], default="newest")
+    analyze.add_argument("--score", type=int, choices=range(1, 6), default=None, help="only reviews with this rating")
+    analyze.add_argument("--max-reviews", type=int, default=900)
+    analyze.add_argument("--threshold", type=float, default=0.05)
+    analyze.add_argument("--top-k", type=int, default=None)
+    analyze.add_argument("--matching", choices=MATCHING_MODES, default="sparse",
+                         help="keyword matching; both modes give identical results")
+    analyze.add_argument("--profile-out", help="append per-stage timings of each app to this JSON lines file")
+    analyze.add_argument("--trace-memory", action="store_true",
+                         help="also record peak memory per stage (slower; process-wide with --concurrency > 1)")
+    analyze.set_defaults(func=run_analyze)
+    return parser
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+# Compare analysis.clean_texts with the original per-character clean_text on
+# synthetic reviews, checking the outputs match before timing them.
+#
+# Run from the repository root:
+#     python -m benchmarks.bench_clean_text [--reviews 100000]
+import argparse
+import random
+import time
+
+from analysis import clean_texts
+
+
+# The implementation clean_texts replaced
+def legacy_clean_text(text):
+    text = text.lower()
+    text = ''.join([char for char in text if char.isalnum() or char.isspace()])
+    return text
+
+
+WORDS = ['aplikasi', 'bagus', 'Sangat', 'MEMBANTU!!', 'gak', 'bisa', 'login...', 'pajak,', 'SPT', '#mantap',
+         'tidak', 'update', 'terus', 'ok_sip', '(error)', 'kelas', 'Google', 'whatsapp?', '5/5']
+NON_ASCII_WORDS = ['😀', '👍👍', '⭐⭐⭐⭐⭐', 'İyi', 'café', 'ｍａｎｔａｐ', '—']
+
+
+def make_contents(n, non_ascii_share=0.2, missing_share=0.01, seed=0):
+    rng = random.Random(seed)
+    contents = []
+    for _ in range(n):
+        if rng.random() < missing_share:
+            contents.append(None)
+            continue
+        words = [rng.choice(WORDS) for _ in range(rng.randint(1, 40))]
+        if rng.random() < non_ascii_share:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(NON_ASCII_WORDS))
+        contents.append(' '.join(words))
+    return contents
+
+
+def best_of(repeat, func, *args):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reviews', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    contents = make_contents(args.reviews)
+    # The original crashed on missing content; compare it on the rest
+    present = [content for content in contents if content is not None]
+
+    legacy_time, expected = best_of(args.repeat, lambda texts: [legacy_clean_text(text) for text in texts], present)
+    new_time, cleaned = best_of(args.repeat, clean_texts, contents)
+    actual = [text for content, text in zip(contents, cleaned) if content is not None]
+    assert actual == expected, "clean_texts output differs from the original clean_text"
+    assert all(text == '' for content, text in zip(contents, cleaned) if content is None)
+
+    print(f"reviews:      {len(contents)} ({len(contents) - len(present)} missing)")
+    print(f"legacy:       {legacy_time:.3f}s  ({len(present) / legacy_time:,.0f} reviews/s)")
+    print(f"clean_texts:  {new_time:.3f}s  ({len(contents) / new_time:,.0f} reviews/s)")
+    print(f"speedup:      {legacy_time / new_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+# End-to-end benchmark of analyze_reviews on synthetic corpora, with the
+# Play Store replaced by benchmarks.synthetic.StubPlayStore.
+#
+# Run from the repository root:
+#     python -m benchmarks.run_benchmarks --sizes 1k,10k,100k --out report.json
+#     python -m benchmarks.run_benchmarks --sizes 1k,10k,100k --compare report.json
+#
+# Each run records end-to-end and per-stage throughput (and peak memory with
+# --trace-memory) plus digests of the results. Comparing against an earlier
+# report shows the speedup per size and whether the results are unchanged.
+import argparse
+import hashlib
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import scraper
+from analysis import analyze_reviews, analyze_reviews_streaming
+from benchmarks.synthetic import StubPlayStore
+from instrumentation import StageProfile
+from inverted_index import MATCHING_MODES
+from keyword_index import compile_keyword_index
+from keywords import keywords_dict
+
+SIZE_SUFFIXES = {'k': 1_000, 'm': 1_000_000}
+
+MODES = ['batch', 'parallel', 'streaming']
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    if text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+# Peak resident set size of this process, or None where getrusage is missing.
+# ru_maxrss is in bytes on macOS and in kilobytes on Linux and the BSDs.
+def max_rss_bytes():
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def _digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+
+
+# Per-keyword match counts and averages; the same for every mode
+def summary_digest(results, overall_avg_sentiment):
+    summary = [(result['keyword'], len(result['reviews']) if 'reviews' in result else result['count'],
+                round(result['average_sentiment'], 9))
+               for result in results]
+    overall = None if overall_avg_sentiment is None else round(overall_avg_sentiment, 9)
+    return _digest([summary, overall])
+
+
+# Every matched review with its similarity and rating (batch modes only)
+def results_digest(results):
+    return _digest([(result['keyword'],
+                     [(review['review'], round(review['score'], 9), review['sentiment_rating'])
+                      for review in result['reviews']])
+                    for result in results])
+
+
+def run_one(size, mode, args, index):
+    rate_limiter = scraper.RateLimiter(delay=0, min_delay=0)
+    profile = StageProfile(f'synthetic-{size}', trace_memory=args.trace_memory)
+    kwargs = dict(max_reviews=size, threshold=args.threshold, profile=profile, rate_limiter=rate_limiter,
+                  matching=args.matching)
+
+    # Trace the whole run, not just the stages, so stage peaks share one baseline
+    if args.trace_memory:
+        tracemalloc.start()
+    gps_reviews = scraper.gps_reviews
+    scraper.gps_reviews = StubPlayStore(size, seed=args.seed)
+    start = time.perf_counter()
+    try:
+        if mode == 'streaming':
+            results, overall_avg_sentiment = analyze_reviews_streaming('benchmark.app', index,
+                                                                       chunk_size=args.chunk_size, keep_refs=False,
+                                                                       **kwargs)
+        else:
+            results, overall_avg_sentiment = analyze_reviews('benchmark.app', index,
+                                                             workers=args.workers if mode == 'parallel' else None,
+                                                             **kwargs)
+    finally:
+        seconds = time.perf_counter() - start
+        scraper.gps_reviews = gps_reviews
+        if args.trace_memory:
+            tracemalloc.stop()
+
+    return {
+        'size': size,
+        'mode': mode,
+        'seconds': seconds,
+        'reviews_per_second': size / seconds if seconds > 0 else None,
+        'peak_memory_bytes': profile.peak_memory_bytes,
+        'max_rss_bytes': max_rss_bytes(),
+        'keywords_matched': len(results),
+        'overall_avg_sentiment': overall_avg_sentiment,
+        'summary_digest': summary_digest(results, overall_avg_sentiment),
+        'results_digest': results_digest(results) if mode != 'streaming' else None,
+        'stages': profile.to_records(),
+    }
+
+
+def compare(report, baseline):
+    previous = {(run['size'], run['mode']): run for run in baseline['runs']}
+    print(f"\n{'size':>9} {'mode':<10} {'before':>9} {'after':>9} {'speedup':>8}  results")
+    for run in report['runs']:
+        before = previous.get((run['size'], run['mode']))
+        if before is None:
+            continue
+        same = run['summary_digest'] == before['summary_digest']
+        if run['results_digest'] and before['results_digest']:
+            same = same and run['results_digest'] == before['results_digest']
+        print(f"{run['size']:>9} {run['mode']:<10} {before['seconds']:>8.2f}s {run['seconds']:>8.2f}s "
+              f"{before['seconds'] / run['seconds']:>7.2f}x  {'same' if same else 'CHANGED'}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='1k,10k,100k', help="corpus sizes, e.g. 1k,10k,100k,1m")
+    parser.add_argument('--modes', default='batch,streaming', help=f"any of {','.join(MODES)}")
+    parser.add_argument('--workers', type=int, default=4, help="processes for the parallel mode")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="chunk size for the streaming mode")
+    parser.add_argument('--matching', default='sparse', choices=MATCHING_MODES,
+                        help="keyword matching (sparse product or inverted index)")
+    parser.add_argument('--threshold', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--trace-memory', action='store_true', help="record peak memory (slower)")
+    parser.add_argument('--out', help="write the report to this JSON file")
+    parser.add_argument('--compare', help="earlier report to compare speed and results against")
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+    modes = [mode.strip() for mode in args.modes.split(',')]
+    for mode in modes:
+        if mode not in MODES:
+            parser.error(f"unknown mode {mode!r}")
+
+    start = time.perf_counter()
+    index = compile_keyword_index(keywords_dict, path=None)
+    compile_seconds = time.perf_counter() - start
+
+    report = {
+        'created_at': time.time(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'threshold': args.threshold,
+        'matching': args.matching,
+        'keywords': len(index),
+        'compile_index_seconds': compile_seconds,
+        'runs': [],
+    }
+    print(f"{'size':>9} {'mode':<10} {'seconds':>9} {'reviews/s':>11} {'matched':>8}  summary")
+    for size in sizes:
+        for mode in modes:
+            run = run_one(size, mode, args, index)
+            report['runs'].append(run)
+            print(f"{size:>9} {mode:<10} {run['seconds']:>8.2f}s {run['reviews_per_second']:>11,.0f} "
+                  f"{run['keywords_matched']:>8}  {run['summary_digest']}")
+            for stage in run['stages']:
+                rate = f"{stage['items_per_second']:,.0f}/s" if stage['items_per_second'] else ''
+                memory = f"{stage['peak_memory_bytes'] / 2**20:.1f} MiB" if stage['peak_memory_bytes'] else ''
+                print(f"{'':>21} {stage['stage']:<15} {stage['seconds']:>8.3f}s {rate:>14} {memory:>11}")
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+# Synthetic Indonesian-like Play Store reviews and a local stand-in for
+# google_play_scraper.reviews, so the analysis can be run without network.
+#
+# Review i of a corpus depends only on (seed, i), so any page of a corpus of
+# any size can be produced on demand without holding the corpus in memory.
+import random
+from datetime import datetime, timedelta
+
+from keyword_index import parse_keyword_entry
+from keywords import keywords_dict
+
+FILLER_WORDS = [
+    'aplikasi', 'ini', 'saya', 'sangat', 'tidak', 'bisa', 'sudah', 'tolong', 'min', 'kak', 'gak', 'nya', 'lagi',
+    'terus', 'pas', 'mau', 'buat', 'yang', 'dan', 'tapi', 'kenapa', 'setelah', 'update', 'versi', 'terbaru',
+    'login', 'akun', 'masuk', 'keluar', 'error', 'lemot', 'lambat', 'cepat', 'mudah', 'susah', 'fitur', 'baru',
+    'selalu', 'kadang', 'sering', 'hp', 'android', 'notifikasi', 'data', 'hilang', 'muncul', 'loading', 'lama',
+]
+SENTIMENT_WORDS = [
+    'bagus', 'mantap', 'keren', 'jelek', 'parah', 'kecewa', 'puas', 'membantu', 'good', 'great', 'love', 'best',
+    'nice', 'bad', 'worst', 'terrible', 'hate', 'useless', 'awesome', 'thanks', 'amazing', 'poor', 'slow',
+]
+DECORATIONS = ['!!', '...', '??', ',', '.', ':)', ':(', '😀', '👍', '🙏', '😡', '⭐⭐⭐⭐⭐', '#mantap', '2x']
+
+KEYWORD_PHRASES = sorted({phrase for entry in keywords_dict.values() for phrase, _ in parse_keyword_entry(entry)})
+
+START_TIME = datetime(2024, 1, 1)
+
+
+def make_content(rng):
+    roll = rng.random()
+    if roll < 0.005:
+        return None
+    if roll < 0.02:
+        return ''
+    words = []
+    for _ in range(rng.randint(1, 30)):
+        pick = rng.random()
+        if pick < 0.15:
+            words.append(rng.choice(KEYWORD_PHRASES))
+        elif pick < 0.30:
+            words.append(rng.choice(SENTIMENT_WORDS))
+        elif pick < 0.35:
+            words.append(rng.choice(DECORATIONS))
+        else:
+            words.append(rng.choice(FILLER_WORDS))
+    if rng.random() < 0.1:
+        words[0] = words[0].upper()
+    return ' '.join(words)
+
+
+# Review i of the corpus with the given seed, in google_play_scraper's shape.
+# Lower i is newer, matching Sort.NEWEST.
+def make_review(i, seed=0, size=None):
+    rng = random.Random(seed * 1_000_003 + i)
+    age = (size - i) if size is not None else -i
+    return {
+        'reviewId': f'synthetic-{seed}-{i}',
+        'userName': f'user{rng.randrange(100_000)}',
+        'userImage': None,
+        'content': make_content(rng),
+        'score': rng.choice([1, 1, 2, 3, 4, 5, 5, 5]),
+        'thumbsUpCount': rng.randrange(20),
+        'reviewCreatedVersion': None,
+        'at': START_TIME + timedelta(minutes=age),
+        'replyContent': None,
+        'repliedAt': None,
+        'appVersion': None,
+    }
+
+
+def make_reviews(n, seed=0):
+    for i in range(n):
+        yield make_review(i, seed, n)
+
+
+class _ContinuationToken:
+    def __init__(self, token, count):
+        self.token = token
+        self.count = count
+
+
+# Drop-in replacement for google_play_scraper.reviews serving a synthetic
+# corpus of size reviews per app. Counts how many pages were requested.
+# Star rating filters are ignored.
+class StubPlayStore:
+    def __init__(self, size, seed=0):
+        self.size = size
+        self.seed = seed
+        self.calls = 0
+
+    def __call__(self, app_id, lang='en', country='us', sort=None, count=100, filter_score_with=None,
+                 filter_device_with=None, continuation_token=None):
+        self.calls += 1
+        start = 0
+        if continuation_token is not None:
+            if continuation_token.token is None:
+                return [], continuation_token
+            start, count = continuation_token.token, continuation_token.count
+        stop = min(start + count, self.size)
+        page = [make_review(i, self.seed, self.size) for i in range(start, stop)]
+        return page, _ContinuationToken(stop if stop < self.size else None, count)
@@ -0,0 +1,87 @@
+from collections.abc import Sequence
+
+import numpy as np
+import pandas as pd
+
+
+# Array-backed analysis results. Matches are stored CSR-style by keyword:
+# the matches of keyword k are review_idx[indptr[k]:indptr[k + 1]] (int32)
+# with their similarity (float32). review_idx points into a deduplicated
+# review table holding each matched review once, however many keywords it
+# matched. As a Sequence, it behaves like the list analyze_reviews returns:
+# item i is the dict for the i-th matched keyword, built only when accessed.
+class CompactResults(Sequence):
+    def __init__(self, keywords, indptr, review_idx, similarity, reviews, average_sentiment,
+                 overall_avg_sentiment):
+        self.keywords = keywords
+        self.indptr = indptr
+        self.review_idx = review_idx
+        self.similarity = similarity
+        self.reviews = reviews
+        self.average_sentiment = average_sentiment
+        self.overall_avg_sentiment = overall_avg_sentiment
+        self.matched_keywords = np.flatnonzero(np.diff(indptr))
+
+    # keyword_idx/review_idx/similarity are the (keyword, review) pairs sorted by
+    # keyword then review, with review_idx into the full review list; review_ids,
+    # review_texts and ratings describe every review, matched or not
+    @classmethod
+    def from_matches(cls, keywords, keyword_idx, review_idx, similarity, review_ids, review_texts, ratings):
+        matched, review_idx = np.unique(review_idx, return_inverse=True)
+        reviews = pd.DataFrame({
+            "reviewId": [review_ids[j] for j in matched],
+            "review": [review_texts[j] for j in matched],
+            "sentiment_rating": np.asarray(ratings)[matched].astype(np.int8),
+        })
+        counts = np.bincount(keyword_idx, minlength=len(keywords))
+        indptr = np.zeros(len(keywords) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+
+        pair_ratings = reviews["sentiment_rating"].to_numpy(dtype=np.int64)[review_idx]
+        rating_sums = np.bincount(keyword_idx, weights=pair_ratings, minlength=len(keywords))
+        average_sentiment = np.full(len(keywords), np.nan)
+        np.divide(rating_sums, counts, out=average_sentiment, where=counts > 0)
+        overall_avg_sentiment = float(pair_ratings.sum() / len(pair_ratings)) if len(pair_ratings) else None
+
+        return cls(list(keywords), indptr, review_idx.astype(np.int32), np.asarray(similarity, dtype=np.float32),
+                   reviews, average_sentiment, overall_avg_sentiment)
+
+    def __len__(self):
+        return len(self.matched_keywords)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        keyword_idx = self.matched_keywords[i]
+        return {"keyword": self.keywords[keyword_idx], "reviews": self.review_page(keyword_idx),
+                "average_sentiment": float(self.average_sentiment[keyword_idx])}
+
+    def review_count(self, keyword_idx):
+        return int(self.indptr[keyword_idx + 1] - self.indptr[keyword_idx])
+
+    # Matched reviews start:stop of one keyword (by its index in keywords), in
+    # the {"review", "score", "sentiment_rating"} shape of analyze_reviews
+    def review_page(self, keyword_idx, start=0, stop=None):
+        begin, end = self.indptr[keyword_idx], self.indptr[keyword_idx + 1]
+        stop = end - begin if stop is None else min(stop, end - begin)
+        rows = self.review_idx[begin + start:begin + stop]
+        texts = self.reviews["review"].to_numpy()[rows]
+        ratings = self.reviews["sentiment_rating"].to_numpy()[rows]
+        scores = self.similarity[begin + start:begin + stop]
+        return [{"review": text, "score": float(score), "sentiment_rating": int(rating)}
+                for text, score, rating in zip(texts, scores, ratings)]
+
+    # Keyword, match count and average sentiment of each matched keyword,
+    # without building the review lists
+    def keyword_summaries(self):
+        return [{"keyword": self.keywords[k], "review_count": self.review_count(k),
+                 "average_sentiment": float(self.average_sentiment[k])}
+                for k in self.matched_keywords.tolist()]
+
+    def to_dicts(self):
+        return list(self)
+
+    @property
+    def nbytes(self):
+        return (self.indptr.nbytes + self.review_idx.nbytes + self.similarity.nbytes
+                + self.average_sentiment.nbytes + int(self.reviews.memory_usage(deep=True).sum()))
@@ -0,0 +1,88 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+# Per-stage wall time, item counts and peak memory for one analysis run.
+# Stages that run more than once (e.g. once per chunk in streaming mode) are
+# accumulated under the same name: times and items add up, peak memory is the
+# maximum. Peak memory is only measured with trace_memory, since tracemalloc
+# slows allocation down; it is process-wide, so concurrent analyses in threads
+# share it.
+class StageProfile:
+    def __init__(self, app_id=None, trace_memory=False):
+        self.app_id = app_id
+        self.trace_memory = trace_memory
+        self.created_at = time.time()
+        self.stages = {}
+        # Highest total traced memory seen during any stage
+        self.peak_memory_bytes = None
+
+    @contextmanager
+    def stage(self, name, items=None):
+        record = {"items": items}
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            seconds = time.perf_counter() - start
+            peak_memory = None
+            if self.trace_memory:
+                traced_peak = tracemalloc.get_traced_memory()[1]
+                peak_memory = max(0, traced_peak - baseline)
+                self.peak_memory_bytes = max(self.peak_memory_bytes or 0, traced_peak)
+            if started_tracing:
+                tracemalloc.stop()
+            self._add(name, seconds, record["items"], peak_memory)
+
+    def _add(self, name, seconds, items, peak_memory):
+        stage = self.stages.setdefault(name, {"seconds": 0.0, "items": None, "peak_memory_bytes": None, "calls": 0})
+        stage["seconds"] += seconds
+        stage["calls"] += 1
+        if items is not None:
+            stage["items"] = (stage["items"] or 0) + items
+        if peak_memory is not None:
+            stage["peak_memory_bytes"] = max(stage["peak_memory_bytes"] or 0, peak_memory)
+
+    @property
+    def total_seconds(self):
+        return sum(stage["seconds"] for stage in self.stages.values())
+
+    # One dict per stage, in the order the stages first ran
+    def to_records(self):
+        records = []
+        for name, stage in self.stages.items():
+            items_per_second = None
+            if stage["items"] is not None and stage["seconds"] > 0:
+                items_per_second = stage["items"] / stage["seconds"]
+            records.append({"app_id": self.app_id, "run_at": self.created_at, "stage": name,
+                            "seconds": stage["seconds"], "calls": stage["calls"], "items": stage["items"],
+                            "items_per_second": items_per_second,
+                            "peak_memory_bytes": stage["peak_memory_bytes"]})
+        return records
+
+    # Append the stage records to a JSON lines file (or any writable file object)
+    def write_jsonl(self, path_or_file):
+        lines = "".join(json.dumps(record) + "\n" for record in self.to_records())
+        if hasattr(path_or_file, "write"):
+            path_or_file.write(lines)
+        else:
+            with open(path_or_file, "a", encoding="utf-8") as f:
+                f.write(lines)
+
+
+# Stand-in used when no profile is requested, so stages can always be wrapped
+class _NullProfile:
+    @contextmanager
+    def stage(self, name, items=None):
+        yield {"items": items}
+
+
+NULL_PROFILE = _NullProfile()
@@ -0,0 +1,70 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from similarity import Matches, _top_k_per_keyword, match_keywords, normalize_rows
+
+MATCHING_MODES = ['sparse', 'inverted']
+
+
+def _empty_matches():
+    empty = np.array([], dtype=np.int32)
+    return Matches(empty, empty.copy(), np.array([], dtype=np.float64))
+
+
+def _sorted_matches(keyword_idx, review_idx, similarity, threshold, top_k):
+    keep = similarity > threshold
+    keyword_idx, review_idx, similarity = keyword_idx[keep], review_idx[keep], similarity[keep]
+    if top_k is not None:
+        keyword_idx, review_idx, similarity = _top_k_per_keyword(keyword_idx, review_idx, similarity, top_k)
+    order = np.lexsort((review_idx, keyword_idx))
+    return Matches(keyword_idx[order].astype(np.int32), review_idx[order].astype(np.int32), similarity[order])
+
+
+# Inverted index from each term of the keyword vocabulary to the keywords
+# containing it (term -> postings of (keyword id, normalized weight)). A
+# review is only ever scored against keywords it shares a term with; since
+# keywords with no shared term have cosine similarity 0, matching is exact
+# and gives the same pairs and similarities as similarity.match_keywords.
+class InvertedKeywordIndex:
+    def __init__(self, index):
+        self.n_keywords = len(index)
+        self.keywords = normalize_rows(index.keyword_vectors, index.keyword_norms)
+        # CSR over terms: postings of term t are postings[t]
+        self.postings = self.keywords.T.tocsr()
+        self.postings.sort_indices()
+
+    # Walk each review's terms through the postings lists, accumulating scores
+    # only for keywords that share a term with the review
+    def match(self, review_vectors, review_norms, threshold=0.05, top_k=None, chunk_size=10000):
+        review_vectors = csr_matrix(review_vectors)
+        parts = []
+        for start in range(0, review_vectors.shape[0], chunk_size):
+            stop = min(start + chunk_size, review_vectors.shape[0])
+            # Both operands have sorted terms, so each similarity is summed in
+            # term order, exactly as in match_keywords
+            chunk = normalize_rows(review_vectors[start:stop], review_norms[start:stop])
+            scores = (chunk @ self.postings).tocoo()
+            keep = scores.data > threshold
+            parts.append((scores.col[keep], scores.row[keep] + start, scores.data[keep]))
+        if not parts:
+            return _empty_matches()
+        keyword_idx, review_idx, similarity = (np.concatenate(column) for column in zip(*parts))
+        return _sorted_matches(keyword_idx, review_idx, similarity, threshold, top_k)
+
+
+# match(review_vectors, review_norms, threshold, top_k) -> Matches for the
+# given KeywordIndex and matching mode, built once per index and mode and kept
+# on the index
+def get_matcher(index, matching='sparse'):
+    if matching not in MATCHING_MODES:
+        raise ValueError(f"Unknown matching mode {matching!r}; use one of {', '.join(MATCHING_MODES)}")
+    matcher = index.matchers.get(matching)
+    if matcher is None:
+        if matching == 'sparse':
+            def matcher(review_vectors, review_norms, threshold=0.05, top_k=None):
+                return match_keywords(index.keyword_vectors, review_vectors, threshold=threshold, top_k=top_k,
+                                      keyword_norms=index.keyword_norms, review_norms=review_norms)
+        else:
+            matcher = InvertedKeywordIndex(index).match
+        index.matchers[matching] = matcher
+    return matcher
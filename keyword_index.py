@@ -0,0 +1,144 @@
+import ast
+import hashlib
+import os
+import pickle
+import re
+import tempfile
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+# Same tokens CountVectorizer produces by default
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+DEFAULT_INDEX_PATH = "keyword_index.pkl"
+
+_compiled_indexes = {}
+
+
+# keywords_dict values are stringified KeyBERT output, e.g.
+# "[('google classroom', 0.7231), ('google', 0.5693)]"
+def parse_keyword_entry(entry):
+    return [(str(phrase), float(weight)) for phrase, weight in ast.literal_eval(entry)]
+
+
+def keywords_fingerprint(keywords_dict):
+    digest = hashlib.sha1()
+    for key, entry in keywords_dict.items():
+        digest.update(repr((key, entry)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+# Keyword phrases compiled once into a fixed vocabulary and a sparse
+# keyword x term matrix. Each keyword row is the sum of its phrases' term
+# counts, scaled by the phrase weights when use_weights is set. Reviews are
+# only ever transformed against the frozen vocabulary, never fitted.
+class KeywordIndex:
+    def __init__(self, labels, phrases, vocabulary, keyword_vectors, fingerprint=None):
+        self.labels = labels
+        self.phrases = phrases
+        self.vocabulary = vocabulary
+        self.keyword_vectors = keyword_vectors
+        self.fingerprint = fingerprint
+        self.keyword_norms = np.sqrt(np.asarray(keyword_vectors.multiply(keyword_vectors).sum(axis=1)).ravel())
+        # Matchers built for this index by inverted_index.get_matcher, by mode;
+        # they live and die with the index
+        self.matchers = {}
+
+    def __len__(self):
+        return len(self.labels)
+
+    # Matchers are rebuilt on demand rather than sent to worker processes
+    def __getstate__(self):
+        return {**self.__dict__, "matchers": {}}
+
+    @classmethod
+    def build(cls, keywords_dict, use_weights=True):
+        labels, phrases = [], []
+        for entry in keywords_dict.values():
+            if entry in labels:
+                continue  # Duplicate entries were always reported once
+            labels.append(entry)
+            phrases.append(parse_keyword_entry(entry))
+
+        vocabulary = {}
+        rows, cols, data = [], [], []
+        for i, keyword_phrases in enumerate(phrases):
+            for phrase, weight in keyword_phrases:
+                for token in TOKEN_PATTERN.findall(phrase.lower()):
+                    rows.append(i)
+                    cols.append(vocabulary.setdefault(token, len(vocabulary)))
+                    data.append(weight if use_weights else 1.0)
+        # Duplicate (row, col) pairs are summed on construction
+        keyword_vectors = csr_matrix((data, (rows, cols)), shape=(len(labels), len(vocabulary)), dtype=np.float64)
+        keyword_vectors.sum_duplicates()
+        return cls(labels, phrases, vocabulary, keyword_vectors, keywords_fingerprint(keywords_dict))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        return cls(**state)
+
+    # Written to a temporary file first and moved into place, so concurrent
+    # savers and readers never see a partial pickle
+    def save(self, path):
+        state = {"labels": self.labels, "phrases": self.phrases, "vocabulary": self.vocabulary,
+                 "keyword_vectors": self.keyword_vectors, "fingerprint": self.fingerprint}
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    # Count keyword-vocabulary terms in each text. Returns a (texts x vocabulary)
+    # CSR matrix plus each text's L2 norm over *all* of its tokens, so cosine
+    # similarity stays the same as with a vocabulary fitted on the reviews.
+    def transform(self, texts):
+        vocabulary = self.vocabulary
+        indptr, indices, data = [0], [], []
+        norms = np.empty(len(texts), dtype=np.float64)
+        for n, text in enumerate(texts):
+            counts = {}
+            for token in TOKEN_PATTERN.findall(text):
+                counts[token] = counts.get(token, 0) + 1
+            norms[n] = sum(count * count for count in counts.values())
+            for token, count in counts.items():
+                column = vocabulary.get(token)
+                if column is not None:
+                    indices.append(column)
+                    data.append(count)
+            indptr.append(len(indices))
+        review_vectors = csr_matrix((np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int32),
+                                     np.asarray(indptr, dtype=np.int64)), shape=(len(texts), len(vocabulary)))
+        return review_vectors, np.sqrt(norms)
+
+
+# Compile keywords_dict once per process. With a path (e.g. DEFAULT_INDEX_PATH)
+# the index is also pickled there and reused while keywords_dict is unchanged;
+# an unreadable or stale pickle (corrupt, or from other library versions) is
+# rebuilt.
+def compile_keyword_index(keywords_dict, path=None):
+    fingerprint = keywords_fingerprint(keywords_dict)
+    index = _compiled_indexes.get(fingerprint)
+    if index is not None:
+        return index
+
+    if path and os.path.exists(path):
+        try:
+            index = KeywordIndex.load(path)
+        except Exception:
+            index = None
+        if index is not None and index.fingerprint != fingerprint:
+            index = None
+
+    if index is None:
+        index = KeywordIndex.build(keywords_dict)
+        if path:
+            index.save(path)
+
+    _compiled_indexes[fingerprint] = index
+    return index
@@ -0,0 +1,189 @@
+import sqlite3
+from datetime import datetime
+from threading import Lock
+
+from google_play_scraper import Sort
+
+from scraper import iter_batches, iter_reviews
+
+
+# Local SQLite store of scraped reviews, partitioned by (app_id, lang, country).
+# Safe to share between the threads of scraper.scrape_many.
+class ReviewStore:
+    def __init__(self, path='reviews.db'):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = Lock()
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS reviews (
+                    app_id TEXT NOT NULL,
+                    lang TEXT NOT NULL,
+                    country TEXT NOT NULL,
+                    review_id TEXT NOT NULL,
+                    user_name TEXT,
+                    content TEXT,
+                    score INTEGER,
+                    thumbs_up_count INTEGER,
+                    at TEXT,
+                    PRIMARY KEY (app_id, lang, country, review_id)
+                )""")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS reviews_by_time ON reviews (app_id, lang, country, at)")
+            # How far Sort.NEWEST syncs have reached: the newest synced review,
+            # and the oldest review of the unbroken run of newest reviews stored
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS newest_sync (
+                    app_id TEXT NOT NULL,
+                    lang TEXT NOT NULL,
+                    country TEXT NOT NULL,
+                    newest_id TEXT NOT NULL,
+                    newest_at TEXT,
+                    oldest_at TEXT,
+                    PRIMARY KEY (app_id, lang, country)
+                )""")
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add_reviews(self, app_id, reviews, lang='id', country='id'):
+        rows = [(app_id, lang, country, review['reviewId'], review.get('userName'), review.get('content'),
+                 review.get('score'), review.get('thumbsUpCount'), _format_time(review.get('at')))
+                for review in reviews]
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO reviews VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            return self._conn.total_changes - before
+
+    # (newest_id, newest_at, oldest_at) reached by Sort.NEWEST syncs, or None if
+    # there has been none. Reviews stored by other scrapes don't move it.
+    def sync_point(self, app_id, lang='id', country='id'):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT newest_id, newest_at, oldest_at FROM newest_sync "
+                "WHERE app_id = ? AND lang = ? AND country = ?", (app_id, lang, country)).fetchone()
+        if row is None:
+            return None
+        return row[0], _parse_time(row[1]), _parse_time(row[2])
+
+    def set_sync_point(self, app_id, newest_id, newest_at, oldest_at, lang='id', country='id'):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO newest_sync VALUES (?, ?, ?, ?, ?, ?)",
+                               (app_id, lang, country, newest_id, _format_time(newest_at),
+                                _format_time(oldest_at)))
+
+    # Stored reviews, newest first, in the same dict shape google_play_scraper
+    # returns, optionally only those posted at or after since. Rows are read
+    # batch_size at a time.
+    def iter_reviews(self, app_id, lang='id', country='id', filter_score_with=None, limit=None, batch_size=1000,
+                     since=None):
+        query = ("SELECT review_id, user_name, content, score, thumbs_up_count, at FROM reviews "
+                 "WHERE app_id = ? AND lang = ? AND country = ?")
+        params = [app_id, lang, country]
+        if since is not None:
+            query += " AND at >= ?"
+            params.append(_format_time(since))
+        if filter_score_with:
+            query += " AND score = ?"
+            params.append(filter_score_with)
+        query += " ORDER BY at DESC, review_id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            cursor = self._conn.execute(query, params)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for review_id, user_name, content, score, thumbs_up_count, at in rows:
+                yield {"reviewId": review_id, "userName": user_name, "content": content, "score": score,
+                       "thumbsUpCount": thumbs_up_count, "at": _parse_time(at)}
+
+    def load_reviews(self, app_id, lang='id', country='id', filter_score_with=None, limit=None):
+        return list(self.iter_reviews(app_id, lang=lang, country=country, filter_score_with=filter_score_with,
+                                      limit=limit))
+
+
+def _format_time(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+# Yield reviews while adding them to the store batch_size at a time
+def _store_through(store, app_id, reviews, lang, country, batch_size):
+    for batch in iter_batches(reviews, batch_size):
+        store.add_reviews(app_id, batch, lang=lang, country=country)
+        yield from batch
+
+
+# Bring the store up to date for app_id and yield the reviews to analyze.
+# With Sort.NEWEST only reviews newer than the store's sync point are fetched:
+# paging stops at the newest review a previous NEWEST sync reached, then the
+# newest max_reviews reviews of the synced run are read back. This catch-up is
+# not capped at max_reviews, and the sync point only moves once paging has
+# actually reached the previous one, so the synced run never has a gap; only
+# the first sync of an app is capped. Other sort orders and score-filtered
+# scrapes are not runs of the newest reviews: they scrape normally and add
+# whatever is new to the store on the way through, without touching the sync
+# point.
+def iter_synced_reviews(store, app_id, lang='id', country='id', sort=Sort.NEWEST, filter_score_with=None,
+                        max_reviews=900, batch_size=1000, **scrape_kwargs):
+    if sort != Sort.NEWEST or filter_score_with:
+        reviews = iter_reviews(app_id, lang=lang, country=country, sort=sort, filter_score_with=filter_score_with,
+                               max_reviews=max_reviews, **scrape_kwargs)
+        yield from _store_through(store, app_id, reviews, lang, country, batch_size)
+        return
+
+    stop_at = None
+    reached = []
+    point = store.sync_point(app_id, lang=lang, country=country)
+    if point is not None:
+        synced_id, synced_at, oldest_at = point
+
+        def stop_at(review):
+            at = review.get('at')
+            if review['reviewId'] == synced_id or (at is not None and synced_at is not None and at < synced_at):
+                reached.append(review['reviewId'])
+                return True
+            return False
+
+    new_reviews = iter_reviews(app_id, lang=lang, country=country, sort=sort,
+                               max_reviews=max_reviews if point is None else None, stop_at=stop_at,
+                               **scrape_kwargs)
+    newest = oldest = None
+    for review in _store_through(store, app_id, new_reviews, lang, country, batch_size):
+        newest = newest or review
+        oldest = review
+
+    if point is None:
+        if newest is None:
+            return  # The app has no reviews
+        oldest_at = oldest.get('at')
+        store.set_sync_point(app_id, newest['reviewId'], newest.get('at'), oldest_at, lang=lang, country=country)
+    elif newest is not None and reached:
+        store.set_sync_point(app_id, newest['reviewId'], newest.get('at'), oldest_at, lang=lang, country=country)
+    # Otherwise paging ran out before reaching the sync point; the reviews
+    # stored on the way are kept, but the next sync catches up from the old
+    # sync point again
+    yield from store.iter_reviews(app_id, lang=lang, country=country, limit=max_reviews, batch_size=batch_size,
+                                  since=oldest_at)
+
+
+# Bring the store up to date for app_id and return the reviews to analyze as a
+# list (see iter_synced_reviews)
+def sync_reviews(store, app_id, lang='id', country='id', sort=Sort.NEWEST, filter_score_with=None,
+                 max_reviews=900, **scrape_kwargs):
+    return list(iter_synced_reviews(store, app_id, lang=lang, country=country, sort=sort,
+                                    filter_score_with=filter_score_with, max_reviews=max_reviews,
+                                    **scrape_kwargs))
@@ -0,0 +1,170 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import monotonic, sleep
+
+from google_play_scraper import Sort
+from google_play_scraper.constants.element import ElementSpecs
+from google_play_scraper.constants.request import Formats
+from google_play_scraper.exceptions import ExtraHTTPError
+from google_play_scraper.features.reviews import _ContinuationToken, _fetch_review_items
+
+
+# The Play Store answered with something that isn't a reviews page
+class ReviewPageError(Exception):
+    pass
+
+
+# One page of google_play_scraper.reviews, with the same arguments and return
+# value. reviews() swallows every error and returns what it has with an empty
+# token, so a failed or rate-limited request looks exactly like the last page;
+# here the error is raised instead, so _fetch_page can retry it.
+def gps_reviews(app_id, lang='en', country='us', sort=Sort.NEWEST, count=100, filter_score_with=None,
+                filter_device_with=None, continuation_token=None):
+    token = None
+    sort = sort.value
+    if continuation_token is not None:
+        if continuation_token.token is None:
+            return [], continuation_token
+        token = continuation_token.token
+        lang, country, sort = continuation_token.lang, continuation_token.country, continuation_token.sort
+        count = continuation_token.count
+        filter_score_with = continuation_token.filter_score_with
+        filter_device_with = continuation_token.filter_device_with
+
+    try:
+        items, token = _fetch_review_items(Formats.Reviews.build(lang=lang, country=country), app_id, sort,
+                                           count, filter_score_with, filter_device_with, token)
+    except (IndexError, ValueError) as error:
+        raise ReviewPageError(f"Unexpected reviews response for {app_id}") from error
+    if isinstance(token, list):
+        token = None  # Last page
+    result = [{key: spec.extract_content(item) for key, spec in ElementSpecs.Review.items()} for item in items]
+    return result, _ContinuationToken(token, lang, country, sort, count, filter_score_with, filter_device_with)
+
+
+# Adaptive delay between Play Store requests. The delay shrinks while requests
+# succeed and grows when they fail, and is shared between threads so several
+# concurrent scrapes still respect one global request rate.
+class RateLimiter:
+    def __init__(self, delay=0.2, min_delay=0.05, max_delay=30.0, backoff=2.0, recovery=0.8):
+        self.delay = delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.recovery = recovery
+        self._lock = Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.delay
+        if slot > now:
+            sleep(slot - now)
+
+    def success(self):
+        with self._lock:
+            self.delay = max(self.min_delay, self.delay * self.recovery)
+
+    def failure(self):
+        with self._lock:
+            self.delay = min(self.max_delay, max(self.delay, self.min_delay) * self.backoff)
+
+
+# Network failures, non-404 HTTP errors and unexpected responses are worth
+# retrying, as is the rate-limit error google_play_scraper raises as a bare
+# Exception. Anything else (NotFoundError for an unknown app, bad arguments)
+# fails the same way on every attempt, so it is raised at once without slowing
+# the shared limiter.
+def _is_transient(error):
+    return isinstance(error, (ExtraHTTPError, OSError, ReviewPageError)) or "PlayGatewayError" in str(error)
+
+
+def _fetch_page(fetch, app_id, lang, country, sort, count, filter_score_with, continuation_token,
+                rate_limiter, max_retries):
+    for attempt in range(max_retries + 1):
+        rate_limiter.wait()
+        try:
+            result = fetch(app_id, lang=lang, country=country, sort=sort, count=count,
+                           filter_score_with=filter_score_with, continuation_token=continuation_token)
+        except Exception as error:
+            if not _is_transient(error):
+                raise
+            rate_limiter.failure()
+            if attempt == max_retries:
+                raise
+            continue
+        rate_limiter.success()
+        return result
+
+
+# Yield reviews one at a time, following continuation tokens page by page,
+# until max_reviews have been yielded (None for no limit) or there are no more
+# pages. Reviews repeated within a page or from the previous page are dropped
+# (by reviewId); only one page of IDs is kept, so memory doesn't grow with the
+# number of reviews scraped. If stop_at is given, paging stops at the first
+# review for which stop_at(review) is true; that review and everything after
+# it are left out.
+def iter_reviews(app_id, lang='id', country='id', sort=Sort.NEWEST, filter_score_with=None,
+                 max_reviews=None, batch_size=100, rate_limiter=None, max_retries=3, fetch=None,
+                 stop_at=None):
+    fetch = fetch or gps_reviews
+    rate_limiter = rate_limiter or RateLimiter()
+    # google_play_scraper expects None, not "", for "all scores"
+    filter_score_with = filter_score_with or None
+
+    yielded = 0
+    previous_ids = set()
+    continuation_token = None
+    while max_reviews is None or yielded < max_reviews:
+        result, continuation_token = _fetch_page(fetch, app_id, lang, country, sort, batch_size,
+                                                 filter_score_with, continuation_token,
+                                                 rate_limiter, max_retries)
+        new_reviews = [review for review in result if review['reviewId'] not in previous_ids]
+        if not new_reviews:
+            break  # Empty or repeated page, nothing more to fetch
+        previous_ids = {review['reviewId'] for review in result}
+        page_ids = set()
+        for review in new_reviews:
+            if review['reviewId'] in page_ids:
+                continue  # Repeated within the page
+            if stop_at is not None and stop_at(review):
+                return  # Reached reviews we already have
+            if max_reviews is not None and yielded >= max_reviews:
+                return
+            page_ids.add(review['reviewId'])
+            yielded += 1
+            yield review
+        if continuation_token is None or continuation_token.token is None:
+            break  # No more pages to fetch
+
+
+# Scrape up to max_reviews reviews into a list (see iter_reviews)
+def scrape_reviews(app_id, lang='id', country='id', sort=Sort.NEWEST, filter_score_with=None,
+                   max_reviews=900, **kwargs):
+    return list(iter_reviews(app_id, lang=lang, country=country, sort=sort,
+                             filter_score_with=filter_score_with, max_reviews=max_reviews, **kwargs))
+
+
+# Group any iterable into lists of at most size items
+def iter_batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# Scrape several apps concurrently through a bounded thread pool. All workers
+# share one rate limiter. Returns {app_id: reviews} in the order of app_ids.
+def scrape_many(app_ids, max_workers=4, rate_limiter=None, **kwargs):
+    app_ids = list(dict.fromkeys(app_ids))
+    rate_limiter = rate_limiter or RateLimiter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {app_id: executor.submit(scrape_reviews, app_id, rate_limiter=rate_limiter, **kwargs)
+                   for app_id in app_ids}
+        return {app_id: future.result() for app_id, future in futures.items()}
@@ -0,0 +1,104 @@
+import hashlib
+import sqlite3
+from threading import Lock
+
+import numpy as np
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+_analyzer = None
+
+
+def get_analyzer():
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+
+# Function to classify sentiment score into a scale of 1 to 5
+def classify_sentiment(score):
+    if score <= -0.6:
+        return 1
+    elif score <= -0.2:
+        return 2
+    elif score < 0.2:
+        return 3
+    elif score < 0.6:
+        return 4
+    else:
+        return 5
+
+
+# classify_sentiment over an array of compound scores
+def classify_sentiments(scores):
+    scores = np.asarray(scores, dtype=np.float64)
+    return np.select([scores <= -0.6, scores <= -0.2, scores < 0.2, scores < 0.6], [1, 2, 3, 4], 5).astype(np.int8)
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+# Persistent text hash -> VADER compound score cache in SQLite, so texts
+# scored on earlier runs are not scored again.
+class SentimentCache:
+    def __init__(self, path='sentiment_cache.db'):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sentiment (text_hash TEXT PRIMARY KEY, compound REAL NOT NULL)")
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get_many(self, hashes, batch_size=500):
+        found = {}
+        hashes = list(hashes)
+        with self._lock:
+            for start in range(0, len(hashes), batch_size):
+                batch = hashes[start:start + batch_size]
+                placeholders = ", ".join("?" * len(batch))
+                found.update(self._conn.execute(
+                    f"SELECT text_hash, compound FROM sentiment WHERE text_hash IN ({placeholders})", batch))
+        return found
+
+    def put_many(self, scores):
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO sentiment VALUES (?, ?)", scores.items())
+
+
+def _score_chunk(texts):
+    analyzer = get_analyzer()
+    return [analyzer.polarity_scores(text)['compound'] for text in texts]
+
+
+# VADER compound score for each text. Every distinct text is scored at most
+# once, and not at all if the cache already has it. With an executor (e.g. a
+# ProcessPoolExecutor) the texts left to score are split across its workers.
+def score_texts(texts, cache=None, analyzer=None, executor=None, chunk_size=2000):
+    unique_texts = list(dict.fromkeys(texts))
+    hashes = {text: text_hash(text) for text in unique_texts}
+    cached = cache.get_many(hashes.values()) if cache is not None else {}
+
+    scores = {text: cached[hashes[text]] for text in unique_texts if hashes[text] in cached}
+    to_score = [text for text in unique_texts if text not in scores]
+    if executor is not None:
+        chunks = [to_score[start:start + chunk_size] for start in range(0, len(to_score), chunk_size)]
+        compounds = [compound for chunk in executor.map(_score_chunk, chunks) for compound in chunk]
+    else:
+        analyzer = analyzer or get_analyzer()
+        compounds = [analyzer.polarity_scores(text)['compound'] for text in to_score]
+    scores.update(zip(to_score, compounds))
+
+    new_scores = {hashes[text]: compound for text, compound in zip(to_score, compounds)}
+    if cache is not None and new_scores:
+        cache.put_many(new_scores)
+    return np.array([scores[text] for text in texts], dtype=np.float64)
@@ -0,0 +1,90 @@
+from collections import namedtuple
+
+import numpy as np
+from scipy.sparse import csr_matrix, diags
+
+# Above-threshold (keyword, review) pairs, sorted by keyword then review
+Matches = namedtuple("Matches", ["keyword_idx", "review_idx", "similarity"])
+
+
+# Scale each row of a sparse matrix to unit L2 norm. norms can be passed in
+# when they are not the norms of the stored entries (see KeywordIndex.transform).
+# Rows with a zero norm are left as zeros. Column indices come back sorted, so
+# sparse products sum each similarity in term order whichever operand drives
+# them (see inverted_index.InvertedKeywordIndex).
+def normalize_rows(matrix, norms=None):
+    matrix = csr_matrix(matrix, dtype=np.float64)
+    if norms is None:
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    scale = np.zeros(len(norms), dtype=np.float64)
+    np.divide(1.0, norms, out=scale, where=norms > 0)
+    normalized = diags(scale) @ matrix
+    normalized.sort_indices()
+    return normalized
+
+
+def _top_k_per_keyword(keyword_idx, review_idx, similarity, top_k):
+    # Highest similarity first within each keyword, ties broken by review order
+    order = np.lexsort((review_idx, -similarity, keyword_idx))
+    keyword_idx, review_idx, similarity = keyword_idx[order], review_idx[order], similarity[order]
+    group_start = np.r_[0, np.flatnonzero(np.diff(keyword_idx)) + 1]
+    group_sizes = np.diff(np.r_[group_start, len(keyword_idx)])
+    rank = np.arange(len(keyword_idx)) - np.repeat(group_start, group_sizes)
+    keep = rank < top_k
+    return keyword_idx[keep], review_idx[keep], similarity[keep]
+
+
+# Cosine similarity between every keyword and review, computed as a sparse
+# product of row-normalized CSR matrices over chunks of chunk_size reviews so
+# no dense keywords x reviews matrix is ever built. Only pairs with
+# similarity > threshold are kept; with top_k, at most the top_k best reviews
+# per keyword.
+def match_keywords(keyword_vectors, review_vectors, threshold=0.05, top_k=None, chunk_size=10000,
+                   keyword_norms=None, review_norms=None):
+    keywords = normalize_rows(keyword_vectors, keyword_norms)
+    review_vectors = csr_matrix(review_vectors)
+    n_reviews = review_vectors.shape[0]
+
+    keyword_parts, review_parts, similarity_parts = [], [], []
+    for start in range(0, n_reviews, chunk_size):
+        stop = min(start + chunk_size, n_reviews)
+        chunk = normalize_rows(review_vectors[start:stop],
+                               None if review_norms is None else review_norms[start:stop])
+        scores = (keywords @ chunk.T).tocoo()
+        keep = scores.data > threshold
+        keyword_parts.append(scores.row[keep].astype(np.int32))
+        review_parts.append(scores.col[keep].astype(np.int32) + start)
+        similarity_parts.append(scores.data[keep])
+
+        if top_k is not None:
+            # Prune as we go so candidates never exceed top_k per keyword
+            pruned = _top_k_per_keyword(np.concatenate(keyword_parts), np.concatenate(review_parts),
+                                        np.concatenate(similarity_parts), top_k)
+            keyword_parts, review_parts, similarity_parts = [[part] for part in pruned]
+
+    if not keyword_parts:
+        empty = np.array([], dtype=np.int32)
+        return Matches(empty, empty.copy(), np.array([], dtype=np.float64))
+
+    keyword_idx = np.concatenate(keyword_parts)
+    review_idx = np.concatenate(review_parts)
+    similarity = np.concatenate(similarity_parts)
+    order = np.lexsort((review_idx, keyword_idx))
+    return Matches(keyword_idx[order], review_idx[order], similarity[order])
+
+
+# Combine Matches computed over consecutive shards of the reviews into one
+# result, as if match_keywords had run over all of them at once. offsets are
+# the index of each shard's first review.
+def merge_matches(parts, offsets, top_k=None):
+    parts = list(parts)
+    if not parts:
+        empty = np.array([], dtype=np.int32)
+        return Matches(empty, empty.copy(), np.array([], dtype=np.float64))
+    keyword_idx = np.concatenate([part.keyword_idx for part in parts])
+    review_idx = np.concatenate([part.review_idx + offset for part, offset in zip(parts, offsets)]).astype(np.int32)
+    similarity = np.concatenate([part.similarity for part in parts])
+    if top_k is not None:
+        keyword_idx, review_idx, similarity = _top_k_per_keyword(keyword_idx, review_idx, similarity, top_k)
+    order = np.lexsort((review_idx, keyword_idx))
+    return Matches(keyword_idx[order], review_idx[order], similarity[order])
@@ -1,140 +1,105 @@
+import math
+import time
+
 import streamlit as st
-from google_play_scraper import Sort, reviews as gps_reviews
-from time import sleep
+from google_play_scraper import Sort
 import pandas as pd
 import nltk
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 
+from analysis import analyze_reviews
+from instrumentation import StageProfile
+from keyword_index import DEFAULT_INDEX_PATH, compile_keyword_index
 from keywords import keywords_dict
+from review_store import ReviewStore
+from sentiment import SentimentCache, get_analyzer
 
 import ssl
 
 ssl._create_default_https_context = ssl._create_stdlib_context
 
-# Download necessary NLTK resources
-nltk.download('punkt')
-nltk.download('stopwords')
-
-# Function to scrape, process, and analyze reviews
-def analyze_reviews(app_id, keywords_dict, lang='id', country='id', sort=Sort.NEWEST, filter_score_with=""):
-    def scrape_reviews_batched(app_id, lang='id', country='id', sort=Sort.NEWEST, filter_score_with=""):
-        all_reviews = []
-        scraped_ids = set()
-        for _ in range(9):  # Scrape 9 batches (adjust as needed)
-            result, continuation_token = gps_reviews(app_id, lang=lang, country=country, sort=sort, count=100, filter_score_with=filter_score_with)
-            all_reviews.extend(result)
-            scraped_ids.update(review['reviewId'] for review in result)
-            if not continuation_token:
-                break  # No more pages to fetch, exit loop
-            sleep(1)  # Delay for 1 second between batches
-        return all_reviews
-    
-    reviews_data = scrape_reviews_batched(app_id, lang=lang, country=country, sort=sort, filter_score_with=filter_score_with)
-    
-    df = pd.DataFrame(reviews_data)
-    
-    # text cleaning
-    def clean_text(text):
-        text = text.lower()
-        text = ''.join([char for char in text if char.isalnum() or char.isspace()])
-        return text
-    
-    df['cleaned_review'] = df['content'].apply(clean_text)
-    
-    review_texts = df['cleaned_review'].tolist()
-    
-    # Extract values (keywords) from the dictionary
-    keywords_list = list(keywords_dict.values())
-    
-    # Vectorize the keywords and reviews
-    vectorizer = CountVectorizer().fit_transform(keywords_list + review_texts)
-    keyword_vectors = vectorizer[:len(keywords_list)]
-    review_vectors = vectorizer[len(keywords_list):]
-    
-    # Calculate cosine similarity between each review and each keyword
-    similarities = cosine_similarity(keyword_vectors, review_vectors)
-    
-    # Set a threshold for cosine similarity
-    threshold = 0.05
-    
-    # Initialize sentiment analyzer
-    analyzer = SentimentIntensityAnalyzer()
-    
-    # Function to classify sentiment score into a scale of 1 to 5
-    def classify_sentiment(score):
-        if score <= -0.6:
-            return 1
-        elif score <= -0.2:
-            return 2
-        elif score < 0.2:
-            return 3
-        elif score < 0.6:
-            return 4
-        else:
-            return 5
-    
-    # Filter reviews based on cosine similarity and categorize them by keyword
-    keyword_to_reviews = {}
-    
-    for i, keyword in enumerate(keywords_list):
-        relevant_reviews = [(review_texts[j], similarity) for j, similarity in enumerate(similarities[i]) if similarity > threshold]
-        if relevant_reviews:
-            keyword_to_reviews[keyword] = relevant_reviews
-    
-    # Prepare results for display
-    results = []
-    for keyword, review_list in keyword_to_reviews.items():
-        sentiment_ratings = []
-        keyword_result = {"keyword": keyword, "reviews": []}
-        for review, score in review_list:
-            sentiment_score = analyzer.polarity_scores(review)['compound']
-            sentiment_rating = classify_sentiment(sentiment_score)
-            sentiment_ratings.append(sentiment_rating)
-            keyword_result["reviews"].append({"review": review, "score": score, "sentiment_rating": sentiment_rating})
-        
-        if sentiment_ratings:
-            avg_sentiment = sum(sentiment_ratings) / len(sentiment_ratings)
-            keyword_result["average_sentiment"] = avg_sentiment
-        results.append(keyword_result)
-    
-    # Summarize overall sentiment
-    overall_sentiment_ratings = []
-    for review_list in keyword_to_reviews.values():
-        for review, score in review_list:
-            sentiment_score = analyzer.polarity_scores(review)['compound']
-            sentiment_rating = classify_sentiment(sentiment_score)
-            overall_sentiment_ratings.append(sentiment_rating)
-    
-    overall_avg_sentiment = None
-    if overall_sentiment_ratings:
-        overall_avg_sentiment = sum(overall_sentiment_ratings) / len(overall_sentiment_ratings)
-    
-    return results, overall_avg_sentiment
+# How long analysis results are reused before the Play Store is checked again
+RESULTS_TTL = 60 * 60
+
+REVIEWS_PER_PAGE = 20
+
+
+# Download necessary NLTK resources (once per server process, not per rerun)
+@st.cache_resource
+def load_nltk_resources():
+    nltk.download('punkt')
+    nltk.download('stopwords')
+
+
+@st.cache_resource
+def load_keyword_index():
+    return compile_keyword_index(keywords_dict, path=DEFAULT_INDEX_PATH)
+
+
+@st.cache_resource
+def load_sentiment_analyzer():
+    return get_analyzer()
+
+
+# Results are cached per (app_id, lang, country, sort, filter_score_with) and
+# returned together with the time they were computed and per-stage timings
+@st.cache_data(ttl=RESULTS_TTL, show_spinner=False)
+def run_analysis(app_id, lang, country, sort, filter_score_with):
+    profile = StageProfile(app_id)
+    with ReviewStore() as store, SentimentCache() as sentiment_cache:
+        results, overall_avg_sentiment = analyze_reviews(app_id, load_keyword_index(), lang=lang, country=country,
+                                                         sort=sort, filter_score_with=filter_score_with,
+                                                         store=store, sentiment_cache=sentiment_cache,
+                                                         profile=profile, compact=True)
+    return results, overall_avg_sentiment, time.time(), profile.to_records()
+
+
+load_nltk_resources()
+load_sentiment_analyzer()
 
 # Streamlit app
 st.title("Google Play App Review Analysis")
 app_id = st.text_input("Enter the app ID:", "id.or.muhammadiyah.quran")
+lang = st.text_input("Language:", "id")
+country = st.text_input("Country:", "id")
+sort = st.selectbox("Sort reviews by:", [Sort.NEWEST, Sort.MOST_RELEVANT], format_func=lambda sort: sort.name.title())
+filter_score_with = st.selectbox("Star rating:", ["", 1, 2, 3, 4, 5],
+                                 format_func=lambda score: "All" if score == "" else f"{score} stars")
 
+if st.button("Clear cached results"):
+    run_analysis.clear()
+    st.session_state.pop("analysis_params", None)
+    st.info("Cached results cleared; the next analysis fetches fresh reviews.")
 
 if st.button("Analyze Reviews"):
+    st.session_state["analysis_params"] = (app_id, lang, country, sort, filter_score_with)
+
+# Keep showing the last analysis while the matched reviews are paged through
+if "analysis_params" in st.session_state:
+    started_at = time.time()
     with st.spinner("Analyzing reviews..."):
-        results, overall_avg_sentiment = analyze_reviews(app_id, keywords_dict)
+        results, overall_avg_sentiment, computed_at, stages = run_analysis(*st.session_state["analysis_params"])
+
+    if computed_at < started_at:
+        st.caption(f"Cached result from {int(started_at - computed_at) // 60} min ago")
+    else:
+        st.caption("Fresh result")
+
+    with st.expander("Performance by stage"):
+        stage_table = pd.DataFrame(stages)[["stage", "seconds", "items", "items_per_second", "peak_memory_bytes"]]
+        st.dataframe(stage_table.dropna(axis=1, how="all"), hide_index=True)
 
     if results:
         st.header("Analysis Results")
-        # table_data = []
-        # for result in results:
-        #     for review in result["reviews"]:
-        #         table_data.append({
-        #             "Keyword": result["keyword"],
-        #             "Review": review["review"],
-        #             "Score": review["score"],
-        #             "Sentiment Rating": review["sentiment_rating"]
-        #         })
-        
         st.write(f"Services Domain Score: {overall_avg_sentiment:.2f}") #Average Score
-        # st.table(pd.DataFrame(table_data).set_index("Keyword").reset_index())
\ No newline at end of file
+
+        # Matched reviews are built one page at a time from the compact results
+        phrases = load_keyword_index().phrases
+        keyword_idx = st.selectbox("Keyword:", results.matched_keywords.tolist(),
+                                   format_func=lambda k: ", ".join(phrase for phrase, _ in phrases[k])
+                                   + f" ({results.review_count(k)} reviews)")
+        pages = max(1, math.ceil(results.review_count(keyword_idx) / REVIEWS_PER_PAGE))
+        page = st.number_input("Page:", min_value=1, max_value=pages, value=1)
+        start = (page - 1) * REVIEWS_PER_PAGE
+        st.table(pd.DataFrame(results.review_page(keyword_idx, start, start + REVIEWS_PER_PAGE)))
@@ -0,0 +1,171 @@
+from datetime import datetime, timedelta
+
+import pytest
+from google_play_scraper import Sort
+from google_play_scraper.exceptions import ExtraHTTPError, NotFoundError
+
+from review_store import ReviewStore, sync_reviews
+from scraper import RateLimiter, iter_reviews
+
+START_TIME = datetime(2024, 1, 1)
+
+
+def make_review(n):
+    return {'reviewId': f'r{n}', 'userName': f'user{n}', 'content': f'review {n}', 'score': n % 5 + 1,
+            'thumbsUpCount': 0, 'at': START_TIME + timedelta(minutes=n)}
+
+
+class _Token:
+    def __init__(self, token):
+        self.token = token
+
+
+# Stand-in for scraper.gps_reviews over reviews r0..r{size - 1}. NEWEST serves
+# them newest first; any other sort serves every tenth review, newest first.
+# Pages listed in repeat are served twice; after fail_after pages, requests
+# raise fail_with, or end the paging (token None) if fail_with is None.
+class StubPlayStore:
+    def __init__(self, size, repeat=(), fail_after=None, fail_with=None):
+        self.size = size
+        self.repeat = set(repeat)
+        self.fail_after = fail_after
+        self.fail_with = fail_with
+        self.calls = 0
+
+    def __call__(self, app_id, lang='en', country='us', sort=Sort.NEWEST, count=100, filter_score_with=None,
+                 continuation_token=None):
+        self.calls += 1
+        numbers = list(range(self.size - 1, -1, -1))
+        if sort != Sort.NEWEST:
+            numbers = numbers[::10]
+        if filter_score_with:
+            numbers = [n for n in numbers if make_review(n)['score'] == filter_score_with]
+        page = 0 if continuation_token is None else continuation_token.token
+        if self.fail_after is not None and page >= self.fail_after:
+            if self.fail_with is not None:
+                raise self.fail_with
+            return [], _Token(None)
+        reviews = [make_review(n) for n in numbers[page * count:(page + 1) * count]]
+        next_page = page if page in self.repeat else page + 1
+        self.repeat.discard(page)
+        return reviews, _Token(next_page if next_page * count < len(numbers) else None)
+
+
+def scrape(stub, **kwargs):
+    return list(iter_reviews('app', fetch=stub, rate_limiter=RateLimiter(delay=0, min_delay=0), **kwargs))
+
+
+def sync(store, stub, **kwargs):
+    return sync_reviews(store, 'app', fetch=stub, rate_limiter=RateLimiter(delay=0, min_delay=0), **kwargs)
+
+
+def ids(reviews):
+    return [review['reviewId'] for review in reviews]
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ReviewStore(str(tmp_path / 'reviews.db')) as store:
+        yield store
+
+
+def test_iter_reviews_follows_continuation_tokens():
+    stub = StubPlayStore(250)
+    reviews = scrape(stub, batch_size=100)
+    assert ids(reviews) == [f'r{n}' for n in range(249, -1, -1)]
+    assert stub.calls == 3
+
+
+def test_iter_reviews_stops_at_max_reviews():
+    assert ids(scrape(StubPlayStore(250), max_reviews=120, batch_size=50)) == [f'r{n}' for n in range(249, 129, -1)]
+
+
+def test_iter_reviews_stops_at_a_repeated_page():
+    stub = StubPlayStore(250, repeat={1})
+    reviews = scrape(stub, batch_size=100)
+    assert ids(reviews) == [f'r{n}' for n in range(249, 49, -1)]
+    assert stub.calls == 3
+
+
+def test_iter_reviews_drops_reviews_repeated_from_the_previous_page():
+    pages = {None: ([make_review(3), make_review(2), make_review(2)], _Token(1)),
+             1: ([make_review(2), make_review(1), make_review(0)], _Token(None))}
+
+    def fetch(app_id, continuation_token=None, **kwargs):
+        return pages[continuation_token and continuation_token.token]
+
+    assert ids(scrape(fetch)) == ['r3', 'r2', 'r1', 'r0']
+
+
+def test_iter_reviews_stops_at_known_review():
+    reviews = scrape(StubPlayStore(250), stop_at=lambda review: review['reviewId'] == 'r199')
+    assert ids(reviews) == [f'r{n}' for n in range(249, 199, -1)]
+
+
+def test_iter_reviews_retries_transient_errors_only():
+    stub = StubPlayStore(250, fail_after=1, fail_with=ExtraHTTPError("503"))
+    with pytest.raises(ExtraHTTPError):
+        scrape(stub, batch_size=100, max_retries=2)
+    assert stub.calls == 1 + 3
+
+    stub = StubPlayStore(250, fail_after=0, fail_with=NotFoundError("App not found(404)."))
+    with pytest.raises(NotFoundError):
+        scrape(stub, max_retries=2)
+    assert stub.calls == 1
+
+
+def test_sync_fetches_only_new_reviews(store):
+    assert ids(sync(store, StubPlayStore(300), max_reviews=200)) == [f'r{n}' for n in range(299, 99, -1)]
+
+    stub = StubPlayStore(350)
+    reviews = sync(store, stub, max_reviews=200)
+    assert ids(reviews) == [f'r{n}' for n in range(349, 149, -1)]
+    assert stub.calls == 1
+
+
+def test_sync_catches_up_past_max_reviews(store):
+    sync(store, StubPlayStore(1050), max_reviews=900)
+    sync(store, StubPlayStore(3000), max_reviews=900)
+    # Everything from the first sync's oldest review on is stored, without a gap
+    assert ids(store.load_reviews('app')) == [f'r{n}' for n in range(2999, 149, -1)]
+
+
+def test_sync_ignores_other_sort_orders(store):
+    sync(store, StubPlayStore(1000), max_reviews=900, sort=Sort.MOST_RELEVANT)
+    assert store.sync_point('app') is None
+
+    stub = StubPlayStore(1000)
+    reviews = sync(store, stub, max_reviews=900)
+    assert ids(reviews) == [f'r{n}' for n in range(999, 99, -1)]
+    assert stub.calls == 9
+
+
+def test_sync_reads_back_only_the_synced_run(store):
+    sync(store, StubPlayStore(1000), max_reviews=100, sort=Sort.MOST_RELEVANT)
+    sync(store, StubPlayStore(1000), max_reviews=500)
+    # Older reviews stored by the MOST_RELEVANT scrape are left out
+    reviews = sync(store, StubPlayStore(1000), max_reviews=None)
+    assert ids(reviews) == [f'r{n}' for n in range(999, 499, -1)]
+
+
+def test_sync_with_score_filter_scrapes_filtered_reviews(store):
+    sync(store, StubPlayStore(1000), max_reviews=100)
+    reviews = sync(store, StubPlayStore(1000), max_reviews=100, filter_score_with=1)
+    assert len(reviews) == 100
+    assert all(review['score'] == 1 for review in reviews)
+
+
+def test_truncated_catch_up_keeps_the_sync_point(store):
+    sync(store, StubPlayStore(1000), max_reviews=100)
+    point = store.sync_point('app')
+
+    # Paging ends after two pages, far short of the known reviews
+    sync(store, StubPlayStore(2000, fail_after=2), max_reviews=100)
+    assert store.sync_point('app') == point
+
+    with pytest.raises(ExtraHTTPError):
+        sync(store, StubPlayStore(2000, fail_after=3, fail_with=ExtraHTTPError("503")), max_retries=0)
+    assert store.sync_point('app') == point
+
+    sync(store, StubPlayStore(2000), max_reviews=100)
+    assert ids(store.load_reviews('app')) == [f'r{n}' for n in range(1999, 899, -1)]